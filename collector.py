@@ -1,6 +1,16 @@
 import os
+import re
 import sys
 import csv
+import json
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+GW_FILE_PATTERN = re.compile(r'^gw(\d+)\.csv$')
+MERGED_GW_META_FILENAME = "merged_gw.meta.json"
 
 def get_teams(directory):
     teams = {}
@@ -140,7 +150,7 @@ def collect_gw(gw, directory_name, output_dir, root_directory_name="data/2025-26
                             row['xP'] = xPoints[id]
                         else:
                             row['xP'] = 0.0
-                        rows += [row]
+                        rows.append(row)
 
     fieldnames = ['name', 'position', 'team', 'xP'] + fieldnames
     outf = open(os.path.join(output_dir, "gw" + str(gw) + ".csv"), 'w', encoding="utf-8")
@@ -164,43 +174,25 @@ def merge_all_gws(num_gws, gw_directory):
         merge_gw(i, gw_directory)
 
 
-def regenerate_merged_gw(gw_directory):
-    """Regenerate merged_gw.csv from all individual gw*.csv files.
-    
-    This function rebuilds the merged file from scratch, properly handling
-    schema changes across gameweeks.
+def list_gw_files(gw_directory):
+    """List the gw{num}.csv files in a directory as sorted (gw_num, fname) pairs."""
+    with os.scandir(gw_directory) as entries:
+        gw_files = [(int(m.group(1)), entry.name) for entry in entries
+                    if (m := GW_FILE_PATTERN.match(entry.name)) and entry.is_file()]
+    gw_files.sort()
+    return gw_files
+
+
+def order_merged_columns(all_columns):
+    """Order the union of gameweek columns for merged_gw.csv.
     
     Args:
-        gw_directory: Directory containing gw*.csv files
-    """
-    merged_gw_filename = "merged_gw.csv"
-    out_path = os.path.join(gw_directory, merged_gw_filename)
-    
-    # Find all gameweek files and sort them
-    gw_files = []
-    for fname in os.listdir(gw_directory):
-        if fname.startswith('gw') and fname.endswith('.csv') and fname != merged_gw_filename:
-            try:
-                gw_num = int(fname[2:-4])  # Extract number from 'gw{num}.csv'
-                gw_files.append((gw_num, fname))
-            except ValueError:
-                continue
-    
-    gw_files.sort(key=lambda x: x[0])
-    
-    if not gw_files:
-        print("No gameweek files found")
-        return
+        all_columns: Column names found across all gameweek files
     
-    print(f"Found {len(gw_files)} gameweek files")
-    
-    # First pass: collect all unique column names across all files
-    all_columns = set()
-    for gw_num, fname in gw_files:
-        gw_path = os.path.join(gw_directory, fname)
-        with open(gw_path, 'r', encoding="utf-8") as fin:
-            reader = csv.DictReader(fin)
-            all_columns.update(reader.fieldnames)
+    Returns:
+        List of columns, ending with GW
+    """
+    all_columns = set(all_columns)
     
     # Define column order: standard columns first, then any extras, then GW
     # Standard columns based on typical FPL data structure
@@ -247,20 +239,132 @@ def regenerate_merged_gw(gw_directory):
             final_columns.append(col)
     
     final_columns.append('GW')
+    return final_columns
+
+
+def read_merged_gw_meta(gw_directory):
+    """Read the gw*.csv modification times recorded by the last regenerate.
     
-    print(f"Final schema: {len(final_columns)} columns")
+    Returns None if there is no record, or if merged_gw.csv has been
+    modified or removed since it was written.
+    """
+    meta_path = os.path.join(gw_directory, MERGED_GW_META_FILENAME)
+    out_path = os.path.join(gw_directory, "merged_gw.csv")
+    try:
+        with open(meta_path, 'r', encoding="utf-8") as fin:
+            meta = json.load(fin)
+        if os.stat(out_path).st_mtime_ns != meta['merged']:
+            return None
+        return meta['gws']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def write_merged_gw_meta(gw_directory, gw_mtimes):
+    """Record the gw*.csv modification times merged_gw.csv was built from."""
+    out_path = os.path.join(gw_directory, "merged_gw.csv")
+    meta = {'merged': os.stat(out_path).st_mtime_ns, 'gws': gw_mtimes}
+    with open(os.path.join(gw_directory, MERGED_GW_META_FILENAME), 'w', encoding="utf-8") as fout:
+        json.dump(meta, fout)
+
+
+def regenerate_merged_gw(gw_directory, incremental=False, engine='csv'):
+    """Regenerate merged_gw.csv from all individual gw*.csv files.
     
-    # Second pass: read all data and write with unified schema
-    all_rows = []
+    This function rebuilds the merged file from scratch, properly handling
+    schema changes across gameweeks.
+    
+    With incremental=True, gw*.csv modification times are compared against
+    those recorded in merged_gw.meta.json by the previous run. Nothing is
+    rewritten if no file changed; otherwise only the changed gameweeks are
+    re-read and the other rows are reused from the existing merged_gw.csv.
+    A full rebuild is done if a gameweek file was removed or merged_gw.csv
+    was modified outside this function.
+    
+    With engine='polars', any rebuild reads and concatenates all gameweek
+    files with polars' multi-threaded CSV reader instead of the csv module.
+    
+    Args:
+        gw_directory: Directory containing gw*.csv files
+        incremental: Only re-read gameweek files changed since the last run
+        engine: 'csv' or 'polars' (requires the polars package)
+    """
+    merged_gw_filename = "merged_gw.csv"
+    out_path = os.path.join(gw_directory, merged_gw_filename)
+    
+    # Find all gameweek files, sorted by gameweek
+    gw_files = list_gw_files(gw_directory)
+    
+    if not gw_files:
+        print("No gameweek files found")
+        return
+    
+    print(f"Found {len(gw_files)} gameweek files")
+    
+    gw_mtimes = {fname: os.stat(os.path.join(gw_directory, fname)).st_mtime_ns
+                 for gw_num, fname in gw_files}
+    
+    # Rows of unchanged gameweeks taken from the existing merged file, keyed by GW
+    all_columns = set()
+    reused_rows = {}
+    if incremental:
+        previous_mtimes = read_merged_gw_meta(gw_directory)
+        if previous_mtimes == gw_mtimes:
+            print("No gameweek files changed since the last merge")
+            return
+    
+    if engine == 'polars':
+        regenerate_merged_gw_polars(gw_directory, gw_files)
+        write_merged_gw_meta(gw_directory, gw_mtimes)
+        return
+    
+    if incremental:
+        if previous_mtimes is not None and set(previous_mtimes) <= set(gw_mtimes):
+            with open(out_path, 'r', encoding="utf-8") as fin:
+                reader = csv.DictReader(fin)
+                for row in reader:
+                    reused_rows.setdefault(row['GW'], []).append(row)
+            for gw_num, fname in gw_files:
+                if previous_mtimes.get(fname) != gw_mtimes[fname]:
+                    reused_rows.pop(str(gw_num), None)
+            
+            # Take the schema from the current gameweek headers, not the old merged
+            # header, so columns dropped from a changed gameweek are dropped here too
+            for gw_num, fname in gw_files:
+                if str(gw_num) in reused_rows:
+                    with open(os.path.join(gw_directory, fname), 'r', encoding="utf-8") as fin:
+                        all_columns.update(next(csv.reader(fin), []))
+    
+    # Read the remaining gameweeks, collecting all unique column names
+    loaded_rows = {}
     for gw_num, fname in gw_files:
+        if str(gw_num) in reused_rows:
+            continue
         gw_path = os.path.join(gw_directory, fname)
         with open(gw_path, 'r', encoding="utf-8") as fin:
             reader = csv.DictReader(fin)
+            all_columns.update(reader.fieldnames)
+            rows = []
             for row in reader:
                 row['GW'] = gw_num
-                all_rows.append(row)
+                rows.append(row)
+        loaded_rows[gw_num] = rows
         print(f"  GW{gw_num}: loaded")
     
+    final_columns = order_merged_columns(all_columns)
+    
+    print(f"Final schema: {len(final_columns)} columns")
+    
+    # Combine rows in gameweek order
+    all_rows = []
+    for gw_num, fname in gw_files:
+        if gw_num in loaded_rows:
+            all_rows.extend(loaded_rows[gw_num])
+        else:
+            all_rows.extend(reused_rows[str(gw_num)])
+    if reused_rows:
+        print(f"  Reused {len(reused_rows)} unchanged gameweeks from {merged_gw_filename}")
+    
     # Write the merged file
     with open(out_path, 'w', encoding="utf-8", newline='') as fout:
         writer = csv.DictWriter(fout, fieldnames=final_columns, 
@@ -270,8 +374,37 @@ def regenerate_merged_gw(gw_directory):
             filled_row = {field: row.get(field, '') for field in final_columns}
             writer.writerow(filled_row)
     
+    write_merged_gw_meta(gw_directory, gw_mtimes)
+    
     print(f"Wrote {len(all_rows)} rows to {out_path}")
 
+
+def regenerate_merged_gw_polars(gw_directory, gw_files):
+    """Rebuild merged_gw.csv from the given gameweek files using polars.
+    
+    All values are read as strings so the output matches the csv engine.
+    
+    Args:
+        gw_directory: Directory containing gw*.csv files
+        gw_files: Sorted (gw_num, fname) pairs from list_gw_files
+    """
+    if pl is None:
+        raise ImportError("engine='polars' requires the polars package")
+    
+    out_path = os.path.join(gw_directory, "merged_gw.csv")
+    frames = [
+        pl.scan_csv(os.path.join(gw_directory, fname), infer_schema_length=0)
+        .with_columns(pl.lit(str(gw_num)).alias('GW'))
+        for gw_num, fname in gw_files
+    ]
+    merged = pl.concat(frames, how='diagonal').collect()
+    
+    final_columns = order_merged_columns(set(merged.columns))
+    print(f"Final schema: {len(final_columns)} columns")
+    
+    merged.select(final_columns).write_csv(out_path)
+    print(f"Wrote {merged.height} rows to {out_path}")
+
 def main():
     """Main entry point for the collector script.
     
@@ -279,9 +412,9 @@ def main():
         python collector.py merge <num_gws> <gw_directory>
             Merge gameweeks 1 through num_gws into merged_gw.csv
         
-        python collector.py regenerate <gw_directory>
+        python collector.py regenerate <gw_directory> [--polars]
             Regenerate merged_gw.csv from all gw*.csv files
-            (fixes schema drift issues)
+            (fixes schema drift issues); --polars uses the polars engine
         
         python collector.py collect <player_dir> <output_dir> <root_dir>
             Collect gameweek data from player files
@@ -307,10 +440,11 @@ def main():
     
     elif command == "regenerate":
         if len(sys.argv) < 3:
-            print("Usage: python collector.py regenerate <gw_directory>")
+            print("Usage: python collector.py regenerate <gw_directory> [--polars]")
             sys.exit(1)
         gw_directory = sys.argv[2]
-        regenerate_merged_gw(gw_directory)
+        engine = 'polars' if '--polars' in sys.argv[3:] else 'csv'
+        regenerate_merged_gw(gw_directory, engine=engine)
     
     elif command == "collect":
         if len(sys.argv) < 5:
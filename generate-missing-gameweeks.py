@@ -1,6 +1,11 @@
 import os
 import csv
-from collector import collect_gw, regenerate_merged_gw
+from collector import collect_gw, list_gw_files, regenerate_merged_gw
+
+try:
+    import pyarrow.csv as pacsv
+except ImportError:
+    pacsv = None
 
 # =============================================================================
 # CONFIGURATION - Modify these values as needed
@@ -14,21 +19,30 @@ MISSING_GAMEWEEKS = None
 # Set to True to regenerate merged_gw.csv after collecting
 REGENERATE_MERGED = True
 
+# CSV engine for regenerating merged_gw.csv: 'csv' or 'polars' (requires polars)
+MERGE_ENGINE = 'csv'
+
 # =============================================================================
 
 
 def get_existing_gameweeks(gw_dir):
     """Find which gameweek files already exist."""
-    existing = set()
-    if os.path.exists(gw_dir):
-        for fname in os.listdir(gw_dir):
-            if fname.startswith('gw') and fname.endswith('.csv') and fname != 'merged_gw.csv':
-                try:
-                    gw_num = int(fname[2:-4])
-                    existing.add(gw_num)
-                except ValueError:
-                    continue
-    return existing
+    if not os.path.exists(gw_dir):
+        return set()
+    return {gw_num for gw_num, fname in list_gw_files(gw_dir)}
+
+
+def read_gameweek_rounds(gw_file):
+    """Read the set of round numbers from a player's gw.csv."""
+    if pacsv is not None:
+        table = pacsv.read_csv(
+            gw_file, convert_options=pacsv.ConvertOptions(include_columns=['round']))
+        return set(table.column('round').to_pylist())
+
+    with open(gw_file, 'r', newline='', buffering=1 << 20) as f:
+        reader = csv.reader(f)
+        round_idx = next(reader).index('round')
+        return {int(row[round_idx]) for row in reader if row}
 
 
 def get_available_gameweeks(player_dir):
@@ -41,10 +55,7 @@ def get_available_gameweeks(player_dir):
         if os.path.isdir(player_path):
             gw_file = os.path.join(player_path, 'gw.csv')
             if os.path.exists(gw_file):
-                with open(gw_file, 'r') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        available.add(int(row['round']))
+                available = read_gameweek_rounds(gw_file)
                 break  # Only need to check one player
 
     return available
@@ -57,7 +68,7 @@ def main():
 
     # Determine which gameweeks to collect
     if MISSING_GAMEWEEKS is not None:
-        gameweeks_to_collect = MISSING_GAMEWEEKS
+        gameweeks_to_collect = sorted(set(MISSING_GAMEWEEKS))
     else:
         existing = get_existing_gameweeks(gw_dir)
         available = get_available_gameweeks(player_dir)
@@ -77,7 +88,7 @@ def main():
 
     if REGENERATE_MERGED:
         print("Regenerating merged_gw.csv...")
-        regenerate_merged_gw(gw_dir)
+        regenerate_merged_gw(gw_dir, incremental=True, engine=MERGE_ENGINE)
         print("Done.")
 
 
@@ -1,8 +1,26 @@
 import pandas as pd
 import os
 import csv
+import json
+import time
+import queue
+import threading
+from datetime import datetime
+import pytz
+from concurrent.futures import ThreadPoolExecutor
 from understatapi import UnderstatClient
 
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    CSV_ENGINE = 'c'
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # =============================================================================
 # CONFIGURATION - Modify these values as needed
 # =============================================================================
@@ -15,163 +33,321 @@ SEASON = '2025-26'
 # Set to True to also fetch individual player match data (slower)
 FETCH_INDIVIDUAL_PLAYERS = True
 
+# Number of individual player requests to keep in flight at once
+# (kept below the shared requests session's pool size of 10)
+PLAYER_FETCH_WORKERS = 8
+
+# Fetched players allowed to wait for writing before the fetch workers pause
+PLAYER_QUEUE_SIZE = 32
+
+# Reuse cached individual player responses younger than this many hours
+PLAYER_CACHE_TTL_HOURS = 24
+
+# Reuse cached team histories younger than this many hours, as long as none
+# of their unplayed matches has kicked off yet
+TEAM_CACHE_TTL_HOURS = 24
+
+# Output format for understat files: 'csv' or 'parquet' (parquet requires pyarrow)
+OUTPUT_FORMAT = 'csv'
+
 # =============================================================================
 
+# Timezone of the kick-off times Understat reports
+UK_TIMEZONE = pytz.timezone('Europe/London')
+
 
 def get_understat_year(season):
     """Convert FPL season format to understat year (e.g., '2025-26' -> '2025')."""
     return season.split('-')[0]
 
 
-def get_epl_data(season=None):
-    """Fetch EPL league data from understat using understatAPI."""
+def load_cached_json(path, max_age=None):
+    """Load a cached JSON response, or None if it is missing or older than max_age seconds."""
+    try:
+        if max_age is not None and time.time() - os.path.getmtime(path) > max_age:
+            return None
+        with open(path, 'rb') as f:
+            content = f.read()
+        return orjson.loads(content) if orjson else json.loads(content)
+    except (OSError, ValueError):
+        return None
+
+
+def save_cached_json(path, data):
+    """Save a JSON response to the cache."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    content = orjson.dumps(data) if orjson else json.dumps(data).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(content)
+
+
+def team_cache_is_current(match_data):
+    """Check whether a cached team history is still current by its fixtures.
+
+    A history is stale once the kick-off of any of its unplayed matches has
+    passed, since that match may now have a result. Understat kick-off times
+    are UK local time. An empty history is never current. This does not catch
+    rescheduled fixtures or corrections to played matches, so callers also
+    limit the cache age (TEAM_CACHE_TTL_HOURS).
+    """
+    if not match_data:
+        return False
+    now = datetime.now(UK_TIMEZONE).strftime('%Y-%m-%d %H:%M:%S')
+    return all(m['isResult'] or m['datetime'] > now for m in match_data)
+
+
+def get_epl_data(understat, season=None, cache_dir=None):
+    """Fetch EPL league data from understat using an open UnderstatClient.
+
+    Returns a dict of team match histories and a DataFrame of player summaries.
+    If cache_dir is given, team histories are cached there and refetched once
+    they are older than TEAM_CACHE_TTL_HOURS or a new match may have been
+    played (see team_cache_is_current).
+    """
     if season is None:
         season = SEASON
     year = get_understat_year(season)
 
     print(f"Fetching EPL data for {year} season...")
 
-    with UnderstatClient() as understat:
-        # Get player data for the league
-        try:
-            player_data = understat.league(league="EPL").get_player_data(season=year)
-        except Exception as e:
-            print(f"\nError: Could not fetch data for {year} season.")
-            print(f"This usually means the season data isn't available on Understat yet.")
-            print(f"Try an earlier season like '2024-25' or '2023-24'.")
-            print(f"\nOriginal error: {e}")
-            return {}, []
-
-        if not player_data:
-            print(f"\nWarning: No player data found for {year} season.")
-            return {}, []
-
-        # Get team data - we need to fetch each team's match data
-        team_data = {}
-        teams = set(p['team_title'] for p in player_data)
-
-        for team in teams:
-            team_name = team.replace(' ', '_')
-            print(f"  Fetching team data: {team}")
-            try:
-                match_data = understat.team(team=team_name).get_match_data(season=year)
+    # Get player data for the league
+    try:
+        player_data = understat.league(league="EPL").get_player_data(season=year)
+    except Exception as e:
+        print(f"\nError: Could not fetch data for {year} season.")
+        print(f"This usually means the season data isn't available on Understat yet.")
+        print(f"Try an earlier season like '2024-25' or '2023-24'.")
+        print(f"\nOriginal error: {e}")
+        return {}, pd.DataFrame()
+
+    if not player_data:
+        print(f"\nWarning: No player data found for {year} season.")
+        return {}, pd.DataFrame()
+
+    player_frame = pd.DataFrame.from_records(player_data)
+
+    # Get team data - we need to fetch each team's match data
+    team_data = {}
+    teams = player_frame['team_title'].unique()
+
+    for team in teams:
+        team_name = team.replace(' ', '_')
+        cache_path = None
+        if cache_dir:
+            cache_path = os.path.join(cache_dir, f'team_{team_name}_{year}.json')
+            match_data = load_cached_json(cache_path, TEAM_CACHE_TTL_HOURS * 3600)
+            if match_data is not None and team_cache_is_current(match_data):
+                print(f"  Using cached team data: {team}")
                 team_data[team_name] = {
                     'title': team,
                     'history': match_data
                 }
-            except Exception as e:
-                print(f"    Warning: Could not fetch data for {team}: {e}")
+                continue
 
-    return team_data, player_data
+        print(f"  Fetching team data: {team}")
+        try:
+            match_data = understat.team(team=team_name).get_match_data(season=year)
+            if cache_path:
+                save_cached_json(cache_path, match_data)
+            team_data[team_name] = {
+                'title': team,
+                'history': match_data
+            }
+        except Exception as e:
+            print(f"    Warning: Could not fetch data for {team}: {e}")
 
+    return team_data, player_frame
 
-def get_player_data(player_id):
-    """Fetch individual player data from understat."""
-    with UnderstatClient() as understat:
-        player = understat.player(player=player_id)
-        matches_data = player.get_match_data()
-        shots_data = player.get_shot_data()
-        # groups_data not directly available, return empty
-        return matches_data, shots_data, {}
+
+def get_player_data(understat, player_id, cache_dir=None):
+    """Fetch individual player data from understat using an open UnderstatClient.
+
+    If cache_dir is given, responses are cached there as {player_id}.json
+    and reused until they are older than PLAYER_CACHE_TTL_HOURS.
+    """
+    cache_path = None
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, f'{player_id}.json')
+        cached = load_cached_json(cache_path, PLAYER_CACHE_TTL_HOURS * 3600)
+        if cached is not None:
+            return cached['matches'], cached['shots'], {}
+
+    player = understat.player(player=player_id)
+    matches_data = player.get_match_data()
+    shots_data = player.get_shot_data()
+
+    if cache_path:
+        save_cached_json(cache_path, {'matches': matches_data, 'shots': shots_data})
+    # groups_data not directly available, return empty
+    return matches_data, shots_data, {}
+
+
+def fetch_player_to_queue(results, stop, understat, player, cache_dir):
+    """Fetch one player's data and put (player, data) on the results queue.
+
+    If the fetch fails, the exception is queued in place of the data.
+    Gives up without queueing anything once the stop event is set, so a
+    worker never stays blocked on a full queue nobody is draining.
+    """
+    if stop.is_set():
+        return
+    try:
+        data = get_player_data(understat, player[0], cache_dir)
+    except Exception as e:
+        data = e
+    while not stop.is_set():
+        try:
+            results.put((player, data), timeout=0.5)
+            return
+        except queue.Full:
+            continue
+
+
+def save_frame(frame, outfile_base, name):
+    """Save a DataFrame as {name}.csv or {name}.parquet depending on OUTPUT_FORMAT."""
+    if OUTPUT_FORMAT == 'parquet':
+        filename = f'{name}.parquet'
+        frame.to_parquet(os.path.join(outfile_base, filename), compression='zstd', index=False)
+    else:
+        filename = f'{name}.csv'
+        frame.to_csv(os.path.join(outfile_base, filename), index=False)
+    return filename
+
+
+def save_records(records, outfile_base, name):
+    """Save a short list of dicts like save_frame.
+
+    CSV output is written directly with csv.DictWriter, which is much cheaper
+    than building a DataFrame for a few dozen rows.
+    """
+    if OUTPUT_FORMAT == 'parquet':
+        return save_frame(pd.DataFrame.from_records(records), outfile_base, name)
+
+    filename = f'{name}.csv'
+    fieldnames = list(dict.fromkeys(key for record in records for key in record))
+    with open(os.path.join(outfile_base, filename), 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(records)
+    return filename
+
+
+def load_frame(outfile_base, name, columns=None):
+    """Load {name}.parquet or {name}.csv, whichever was written most recently."""
+    parquet_path = os.path.join(outfile_base, f'{name}.parquet')
+    csv_path = os.path.join(outfile_base, f'{name}.csv')
+    if os.path.exists(parquet_path) and (
+            not os.path.exists(csv_path)
+            or os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)):
+        return pd.read_parquet(parquet_path, columns=columns)
+    return pd.read_csv(csv_path, usecols=columns, dtype=str, engine=CSV_ENGINE)
 
 
 def parse_epl_data(outfile_base, season=None):
-    """Parse and save EPL data to CSV files."""
+    """Parse and save EPL data to CSV (or Parquet) files."""
     if season is None:
         season = SEASON
 
-    team_data, player_data = get_epl_data(season)
+    cache_dir = os.path.join(outfile_base, '.cache')
 
-    if not team_data and not player_data:
-        print("No data to save.")
-        return
-
-    # Save team data
-    for team_name, data in team_data.items():
-        if data['history']:
-            team_frame = pd.DataFrame.from_records(data['history'])
-            team_frame.to_csv(
-                os.path.join(outfile_base, f'understat_{team_name}.csv'),
-                index=False
-            )
-            print(f"  Saved: understat_{team_name}.csv")
-
-    # Save player summary data
-    if player_data:
-        player_frame = pd.DataFrame.from_records(player_data)
-        player_frame.to_csv(
-            os.path.join(outfile_base, 'understat_player.csv'),
-            index=False
-        )
-        print(f"  Saved: understat_player.csv ({len(player_data)} players)")
-
-    # Optionally fetch individual player match data
-    if FETCH_INDIVIDUAL_PLAYERS and player_data:
-        print(f"\nFetching individual player data ({len(player_data)} players)...")
-        for i, p in enumerate(player_data):
-            player_id = p['id']
-            player_name = p['player_name'].replace(' ', '_')
-
-            try:
-                matches, shots, groups = get_player_data(player_id)
-                if matches:
-                    player_frame = pd.DataFrame.from_records(matches)
-                    player_frame.to_csv(
-                        os.path.join(outfile_base, f'{player_name}_{player_id}.csv'),
-                        index=False
-                    )
-                if (i + 1) % 50 == 0:
-                    print(f"  Progress: {i + 1}/{len(player_data)} players")
-            except Exception as e:
-                print(f"  Warning: Could not fetch data for {player_name}: {e}")
-
-        print(f"  Completed individual player data")
-
-
-class PlayerID:
-    def __init__(self, us_id, fpl_id, us_name, fpl_name):
-        self.us_id = str(us_id)
-        self.fpl_id = str(fpl_id)
-        self.us_name = us_name
-        self.fpl_name = fpl_name
+    # One client (and HTTP session) is shared by every request in the run
+    with UnderstatClient() as understat:
+        team_data, player_frame = get_epl_data(understat, season, cache_dir)
+
+        if not team_data and player_frame.empty:
+            print("No data to save.")
+            return
+
+        # Save team data
+        for team_name, data in team_data.items():
+            if data['history']:
+                filename = save_records(data['history'], outfile_base, f'understat_{team_name}')
+                print(f"  Saved: {filename}")
+
+        # Save player summary data
+        if not player_frame.empty:
+            filename = save_frame(player_frame, outfile_base, 'understat_player')
+            print(f"  Saved: {filename} ({len(player_frame)} players)")
+
+        # Optionally fetch individual player match data
+        if FETCH_INDIVIDUAL_PLAYERS and not player_frame.empty:
+            print(f"\nFetching individual player data ({len(player_frame)} players)...")
+            player_frames = []
+            # Output file names ({player_name}_{id}) built for all players at once
+            file_names = (player_frame['player_name'].str.replace(' ', '_') + '_'
+                          + player_frame['id'].astype(str))
+            # Fetch workers feed a bounded queue that this thread drains and writes,
+            # so network and disk overlap without fetched data piling up
+            results = queue.Queue(maxsize=PLAYER_QUEUE_SIZE)
+            stop = threading.Event()
+            with ThreadPoolExecutor(max_workers=PLAYER_FETCH_WORKERS) as executor:
+                for player in zip(player_frame['id'], player_frame['player_name'], file_names):
+                    executor.submit(fetch_player_to_queue, results, stop, understat,
+                                    player, cache_dir)
+
+                try:
+                    for i in range(len(player_frame)):
+                        (player_id, full_name, file_name), data = results.get()
+
+                        try:
+                            if isinstance(data, Exception):
+                                raise data
+                            matches, shots, groups = data
+                            if matches:
+                                matches_frame = pd.DataFrame.from_records(matches)
+                                if OUTPUT_FORMAT == 'parquet':
+                                    player_frames.append(matches_frame.assign(
+                                        player_id=int(player_id), player_name=full_name))
+                                else:
+                                    save_frame(matches_frame, outfile_base, file_name)
+                        except Exception as e:
+                            print(f"  Warning: Could not fetch data for {full_name}: {e}")
+                        if (i + 1) % 50 == 0:
+                            print(f"  Progress: {i + 1}/{len(player_frame)} players")
+                finally:
+                    # Release workers if draining stops early (e.g. Ctrl-C)
+                    stop.set()
+                    executor.shutdown(wait=False, cancel_futures=True)
+
+            # In parquet mode all players go into one dataset partitioned by player_id
+            if player_frames:
+                pd.concat(player_frames, ignore_index=True).to_parquet(
+                    os.path.join(outfile_base, 'understat_player_matches'),
+                    partition_cols=['player_id'], compression='zstd', index=False,
+                    existing_data_behavior='delete_matching'
+                )
+                print(f"  Saved: understat_player_matches ({len(player_frames)} players)")
+
+            print(f"  Completed individual player data")
 
 
 def match_ids(understat_dir, data_dir):
-    """Match understat player IDs to FPL player IDs."""
-    with open(os.path.join(understat_dir, 'understat_player.csv')) as understat_file:
-        understat_inf = csv.DictReader(understat_file)
-        ustat_players = {}
-        for row in understat_inf:
-            ustat_players[row['player_name']] = row['id']
-
-    with open(os.path.join(data_dir, 'player_idlist.csv')) as fpl_file:
-        fpl_players = {}
-        fpl_inf = csv.DictReader(fpl_file)
-        for row in fpl_inf:
-            fpl_players[row['first_name'] + ' ' + row['second_name']] = row['id']
-
-    players = []
-    found = {}
-    for k, v in ustat_players.items():
-        if k in fpl_players:
-            player = PlayerID(v, fpl_players[k], k, k)
-            players += [player]
-            found[k] = True
-        else:
-            player = PlayerID(v, -1, k, "")
-            players += [player]
-
-    for k, v in fpl_players.items():
-        if k not in found:
-            player = PlayerID(-1, v, "", k)
-            players += [player]
-
-    with open(os.path.join(data_dir, 'id_dict.csv'), 'w+') as outf:
-        outf.write('Understat_ID,FPL_ID,Understat_Name,FPL_Name\n')
-        for p in players:
-            outf.write(f"{p.us_id},{p.fpl_id},{p.us_name},{p.fpl_name}\n")
-
-    print(f"  Saved: id_dict.csv ({len(players)} players)")
+    """Match understat player IDs to FPL player IDs.
+
+    Players are matched on full name; unmatched players on either side are
+    kept with an ID of -1 and an empty name for the missing side.
+    """
+    ustat = load_frame(understat_dir, 'understat_player', columns=['player_name', 'id'])
+    ustat = ustat.astype(str).drop_duplicates('player_name', keep='last')
+
+    fpl = pd.read_csv(os.path.join(data_dir, 'player_idlist.csv'),
+                      usecols=['first_name', 'second_name', 'id'], dtype=str,
+                      engine=CSV_ENGINE)
+    fpl['name'] = fpl['first_name'] + ' ' + fpl['second_name']
+    fpl = fpl.drop_duplicates('name', keep='last')
+
+    merged = ustat.merge(fpl[['name', 'id']], left_on='player_name', right_on='name',
+                         how='outer', suffixes=('_us', '_fpl'))
+    id_dict = pd.DataFrame({
+        'Understat_ID': merged['id_us'].fillna('-1'),
+        'FPL_ID': merged['id_fpl'].fillna('-1'),
+        'Understat_Name': merged['player_name'].fillna(''),
+        'FPL_Name': merged['name'].fillna(''),
+    })
+    id_dict.to_csv(os.path.join(data_dir, 'id_dict.csv'), index=False,
+                   encoding='utf-8', lineterminator='\n')
+
+    print(f"  Saved: id_dict.csv ({len(id_dict)} players)")
 
 
 def main():
@@ -181,21 +357,28 @@ def main():
         python understat.py              # Generate understat data
         python understat.py --match-ids  # Only match player IDs
         python understat.py --quick      # Generate without individual player data
+        python understat.py --parquet    # Write Parquet instead of CSV (combinable);
+                                         # player matches go to one dataset partitioned
+                                         # by player_id (int)
     """
     import sys
 
+    global FETCH_INDIVIDUAL_PLAYERS, OUTPUT_FORMAT
+    args = sys.argv[1:]
+    if '--parquet' in args:
+        OUTPUT_FORMAT = 'parquet'
+
     season_dir = f'data/{SEASON}/'
     understat_dir = f'{season_dir}understat/'
 
     # Create directory if it doesn't exist
     os.makedirs(understat_dir, exist_ok=True)
 
-    if len(sys.argv) > 1 and sys.argv[1] == '--match-ids':
+    if '--match-ids' in args:
         print(f"Matching player IDs for {SEASON}...")
         match_ids(understat_dir, season_dir)
-    elif len(sys.argv) > 1 and sys.argv[1] == '--quick':
+    elif '--quick' in args:
         print(f"Generating understat data for {SEASON} (quick mode)...")
-        global FETCH_INDIVIDUAL_PLAYERS
         FETCH_INDIVIDUAL_PLAYERS = False
         parse_epl_data(understat_dir, SEASON)
         print("\nDone.")